@@ -2,26 +2,40 @@ import streamlit as st
 import pandas as pd
 import io
 import os
+import re
+import uuid
 import altair as alt
 from pathlib import Path
 
 # Import de tes fonctions
-from cleaning_data import (
-    load_and_clean_data,
-    filter_critical_data,
-    identify_exclusive_operations,
-    exclude_employees_based_on_exclusive_couples,
-    filter_by_presence_days
-)
-from calcul import calculate_global_scores
 from functions import (
     generate_scores_between_dates,
-    plot_employee_scores_daily,
+    plot_daily_scores,
     calculer_rendement_usine
 )
+from employee_index import EmployeeDirectory, EmployeeIndex
+from pipeline import DEFAULT_PARAMS, ScoringPipeline, source_fingerprint
+from rendement_usine import DIMENSIONS, RESOLUTIONS, build_yield_store, yield_store_from_sums
+from duckdb_backend import (
+    connect,
+    ingest_file,
+    history_files,
+    list_history,
+    remove_from_history,
+    compute_scores,
+    employee_count,
+    scores_preview,
+    employee_period_scores,
+    employee_mean_scores,
+    employee_daily_scores,
+    employee_tasks,
+    employee_directory,
+    factory_daily_sums
+)
 
 # --- Config ---
 OUTPUT_DIR = "outputs"
+PARQUET_DIR = os.path.join(OUTPUT_DIR, "parquet")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 st.set_page_config(page_title="SOPEM Performance", layout="wide", page_icon="📈")
 
@@ -35,15 +49,95 @@ pages = [
 ]
 page = st.sidebar.radio("Aller à :", pages)
 
-# --- Mise en cache du traitement du fichier ---
-@st.cache_data
+# --- Moteur de calcul ---
+backend = st.sidebar.radio(
+    "Moteur de calcul", ["pandas", "DuckDB (Parquet)"],
+    help="DuckDB accumule les fichiers importés en Parquet sur disque et ne charge que les agrégats."
+)
+use_duckdb = backend != "pandas"
+
+def reset_duckdb_state():
+    st.session_state.parquet_fingerprint = None
+    st.session_state.duckdb_key = None
+
+# --- Historique Parquet : propre à la session par défaut, nommé pour le partager entre sessions ---
+if use_duckdb:
+    if "history_name" not in st.session_state:
+        st.session_state.history_name = f"session-{uuid.uuid4().hex[:8]}"
+    history_name = st.sidebar.text_input(
+        "Historique Parquet", key="history_name",
+        help="Par défaut propre à cette session. Donner le même nom pour cumuler plusieurs années entre sessions."
+    )
+    parquet_dir = os.path.join(PARQUET_DIR, re.sub(r"[^\w-]", "_", history_name.strip()) or "defaut")
+
+# --- Paramètres de scoring ---
+with st.sidebar.expander("⚙️ Paramètres de scoring"):
+    params = {
+        'seuil_pointages': st.slider("Seuil pointages", 1, 10, DEFAULT_PARAMS['seuil_pointages']),
+        'seuil_jours': st.slider("Seuil jours de présence", 1, 30, DEFAULT_PARAMS['seuil_jours']),
+        'mult_peu_donnees': st.number_input("Multiplicateur (peu de pointages)", 1.0, 5.0, DEFAULT_PARAMS['mult_peu_donnees'], 0.1),
+        'mult_cv_eleve': st.number_input("Multiplicateur (cv élevé)", 1.0, 5.0, DEFAULT_PARAMS['mult_cv_eleve'], 0.1),
+        'mult_standard': st.number_input("Multiplicateur (standard)", 1.0, 5.0, DEFAULT_PARAMS['mult_standard'], 0.1),
+        'min_observations': st.number_input("Pointages minimum par couple", 1, 100, DEFAULT_PARAMS['min_observations']),
+        'seuil_cv': st.number_input("Seuil cv", 0.0, 2.0, DEFAULT_PARAMS['seuil_cv'], 0.05),
+        'tolerance_min': st.number_input("Tolérance fraude basse (× q10)", 0.0, 1.0, DEFAULT_PARAMS['tolerance_min'], 0.05),
+        'tolerance_max': st.number_input("Tolérance fraude haute (× q90)", 1.0, 5.0, DEFAULT_PARAMS['tolerance_max'], 0.05),
+    }
+    params['poids_production'] = st.slider("Poids production", 0.0, 1.0, DEFAULT_PARAMS['poids_production'], 0.05)
+    params['poids_duree'] = round(1.0 - params['poids_production'], 2)
+    st.caption(f"Poids durée : {params['poids_duree']}")
+
+# --- Pipeline mémorisé par session : seules les étapes impactées sont recalculées ---
+if "pipeline" not in st.session_state:
+    st.session_state.pipeline = ScoringPipeline()
+
+def process_file_pandas(uploaded_file):
+    pipeline = st.session_state.pipeline
+    df = pipeline.run(uploaded_file, **params)
+    # Annuaire des employés de la page 4 : construit une fois par jeu de scores de base,
+    # un changement de poids ne met à jour que sa moyenne journalière du score global
+    base_scores = pipeline.results['base_scores']
+    if st.session_state.get("base_scores") is not base_scores:
+        st.session_state.employee_index = EmployeeIndex(base_scores)
+        st.session_state.base_scores = base_scores
+    # Sommes journalières du rendement usine : recalculées seulement si les scores changent
+    if st.session_state.get("df") is not df:
+        st.session_state.rendement_store = build_yield_store(df)
+        st.session_state.employee_index.set_global_scores(df)
+    st.session_state.df = df
+    return df
+
+def process_file_duckdb(uploaded_file):
+    if "duckdb_con" not in st.session_state:
+        st.session_state.duckdb_con = connect(temp_directory=os.path.join(OUTPUT_DIR, "duckdb_tmp"))
+    con = st.session_state.duckdb_con
+    # Ingestion Parquet seulement pour un nouveau fichier ; un contenu déjà présent n'est pas ajouté
+    fingerprint = (parquet_dir, source_fingerprint(uploaded_file))
+    if st.session_state.get("parquet_fingerprint") != fingerprint:
+        uploaded_file.seek(0)
+        _, st.session_state.parquet_added = ingest_file(uploaded_file, parquet_dir)
+        st.session_state.parquet_fingerprint = fingerprint
+    # Scores SQL, rendement usine et annuaire : recalculés seulement si les paramètres
+    # ou le contenu de l'historique changent
+    key = (parquet_dir, tuple(history_files(parquet_dir)), tuple(sorted(params.items())))
+    if st.session_state.get("duckdb_key") != key:
+        compute_scores(con, parquet_dir, **params)
+        st.session_state.duckdb_key = key
+        st.session_state.duckdb_store = yield_store_from_sums(
+            {dimension: factory_daily_sums(con, dimension) for dimension in DIMENSIONS}
+        )
+        st.session_state.employee_directory = EmployeeDirectory(employee_directory(con))
+    return con
+
 def process_file(uploaded_file):
-    df = load_and_clean_data(uploaded_file)
-    df = filter_critical_data(df)
-    exclusive_list, _ = identify_exclusive_operations(df)
-    df, _ = exclude_employees_based_on_exclusive_couples(df, exclusive_list)
-    df, _ = filter_by_presence_days(df)
-    return calculate_global_scores(df)
+    if use_duckdb:
+        return process_file_duckdb(uploaded_file)
+    return process_file_pandas(uploaded_file)
+
+def data_ready():
+    if use_duckdb:
+        return bool(st.session_state.get("duckdb_key"))
+    return "df" in st.session_state
 
 # --- Vérification colonnes obligatoires ---
 def validate_dataframe(df):
@@ -52,19 +146,41 @@ def validate_dataframe(df):
         st.error(f"Le fichier doit contenir les colonnes : {required_cols}")
         st.stop()
 
+# --- Recalcul avec les paramètres courants sur les autres pages ---
+if page != pages[0] and "uploaded_file" in st.session_state:
+    process_file(st.session_state.uploaded_file)
+
 # --------------------- PAGE 1 : Import & Période ---------------------
 if page == pages[0]:
     st.title("📂 Importer un fichier & choisir la période")
     uploaded_file = st.file_uploader("Choisissez un fichier (.csv ou .xlsx)", type=["csv", "xlsx"])
 
     if uploaded_file:
+        st.session_state.uploaded_file = uploaded_file
         with st.spinner("Traitement du fichier..."):
-            df = process_file(uploaded_file)
-            validate_dataframe(df)
-            st.session_state.df = df
+            if use_duckdb:
+                con = process_file_duckdb(uploaded_file)
+            else:
+                df = process_file_pandas(uploaded_file)
+                validate_dataframe(df)
 
-        st.success(f"✅ {df['Mat'].nunique()} employés retenus après filtrage")
-        st.dataframe(df.head(20), use_container_width=True)
+        if use_duckdb:
+            nb_fichiers = len(history_files(parquet_dir))
+            if not st.session_state.parquet_added:
+                st.caption("Ce contenu était déjà dans l'historique : il n'a pas été ajouté une seconde fois.")
+            if nb_fichiers > 1:
+                st.warning(
+                    f"L'historique « {history_name} » contient {nb_fichiers} fichiers : les scores DuckDB portent "
+                    "sur l'ensemble de l'historique, alors que le moteur pandas ne traite que le fichier importé."
+                )
+            st.success(f"✅ {employee_count(con)} employés retenus après filtrage")
+            st.dataframe(scores_preview(con), use_container_width=True)
+        else:
+            recomputed = st.session_state.pipeline.recomputed
+            if recomputed:
+                st.caption(f"Étapes recalculées : {', '.join(recomputed)}")
+            st.success(f"✅ {df['Mat'].nunique()} employés retenus après filtrage")
+            st.dataframe(df.head(20), use_container_width=True)
 
         # --- Sélection période ---
         st.markdown("---")
@@ -81,7 +197,10 @@ if page == pages[0]:
         # --- Génération du fichier des scores entre dates ---
         if st.button("📤 Générer le fichier Excel des scores"):
             output_buffer = io.BytesIO()
-            generate_scores_between_dates(df, start_date, end_date, output_buffer)
+            if use_duckdb:
+                employee_period_scores(con, start_date, end_date).to_excel(output_buffer, index=False)
+            else:
+                generate_scores_between_dates(df, start_date, end_date, output_buffer)
             output_buffer.seek(0)
             st.download_button(
                 label="⬇️ Télécharger le fichier des scores",
@@ -93,17 +212,20 @@ if page == pages[0]:
         # --- Téléchargement du DataFrame complet ---
         st.markdown("---")
         st.subheader("💾 Télécharger le DataFrame complet")
-        output_df_buffer = io.BytesIO()
-        with pd.ExcelWriter(output_df_buffer, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name="Data_Complet")
-        output_df_buffer.seek(0)
-
-        st.download_button(
-            label="⬇️ Télécharger le DataFrame complet",
-            data=output_df_buffer,
-            file_name="df_complet.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        if use_duckdb:
+            st.info("Avec DuckDB, les données détaillées restent sur disque : seuls les agrégats sont chargés.")
+        else:
+            output_df_buffer = io.BytesIO()
+            with pd.ExcelWriter(output_df_buffer, engine='xlsxwriter') as writer:
+                df.to_excel(writer, index=False, sheet_name="Data_Complet")
+            output_df_buffer.seek(0)
+
+            st.download_button(
+                label="⬇️ Télécharger le DataFrame complet",
+                data=output_df_buffer,
+                file_name="df_complet.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
 
     else:
         st.info("Veuillez charger un fichier pour commencer.")
@@ -112,23 +234,31 @@ if page == pages[0]:
 elif page == pages[1]:
     st.title("📈 Evolution du score global des employés")
 
-    if "df" in st.session_state:
-        df = st.session_state.df
+    if data_ready():
         start_date, end_date = st.session_state.start_date, st.session_state.end_date
         st.info(f"Période sélectionnée : {start_date} → {end_date}")
 
-        mask = (df['Date'] >= pd.to_datetime(start_date)) & (df['Date'] <= pd.to_datetime(end_date))
-        df_periode = df.loc[mask]
+        if use_duckdb:
+            con = st.session_state.duckdb_con
+            scores_moyens = employee_mean_scores(con, start_date, end_date)
+        else:
+            df = st.session_state.df
+            mask = (df['Date'] >= pd.to_datetime(start_date)) & (df['Date'] <= pd.to_datetime(end_date))
+            df_periode = df.loc[mask]
 
-        scores_moyens = df_periode.groupby('Mat')['score_global_journalier'].mean().reset_index()
-        scores_moyens = scores_moyens.sort_values(by='score_global_journalier', ascending=False)
+            scores_moyens = df_periode.groupby('Mat')['score_global_journalier'].mean().reset_index()
+            scores_moyens = scores_moyens.sort_values(by='score_global_journalier', ascending=False)
         st.dataframe(scores_moyens, use_container_width=True)
 
         top10 = scores_moyens.head(10)['Mat'].tolist()
         selected_mats = st.multiselect("👥 Sélectionner employés à afficher", scores_moyens['Mat'].tolist(), top10)
 
         if selected_mats:
-            chart = alt.Chart(df_periode[df_periode['Mat'].isin(selected_mats)]).mark_line().encode(
+            if use_duckdb:
+                df_selection = employee_daily_scores(con, selected_mats, start_date, end_date)
+            else:
+                df_selection = df_periode[df_periode['Mat'].isin(selected_mats)]
+            chart = alt.Chart(df_selection).mark_line().encode(
                 x='Date:T',
                 y='score_global_journalier:Q',
                 color='Mat:N',
@@ -142,16 +272,41 @@ elif page == pages[1]:
 elif page == pages[2]:
     st.title("🏭 Rendement global de l'usine")
 
-    if "df" in st.session_state:
-        df = st.session_state.df
+    if data_ready():
         start_date, end_date = st.session_state.start_date, st.session_state.end_date
         st.info(f"Période sélectionnée : {start_date} → {end_date}")
 
-        chart = calculer_rendement_usine(df, pd.to_datetime(start_date), pd.to_datetime(end_date))
-        if chart is not None:
-            st.altair_chart(chart, use_container_width=True)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            w_d = st.slider("Poids score durée", 0.0, 1.0, 0.3, 0.05)
+        with col2:
+            w_p = st.slider("Poids score production", 0.0, 1.0, 0.5, 0.05)
+        with col3:
+            w_g = round(1.0 - w_d - w_p, 2)
+            st.metric("Poids score global", w_g)
+        if w_g < 0:
+            st.error("La somme des poids durée et production ne doit pas dépasser 1.")
         else:
-            st.warning("⚠️ Aucun rendement trouvé sur cette période.")
+            col1, col2 = st.columns(2)
+            with col1:
+                resolution = st.selectbox("Résolution", ["auto"] + list(RESOLUTIONS))
+            with col2:
+                dimension = st.selectbox("Détail par", ["Aucun", "Opération", "Produit"])
+
+            if use_duckdb:
+                df, store = None, st.session_state.duckdb_store
+            else:
+                df, store = st.session_state.df, st.session_state.rendement_store
+            chart = calculer_rendement_usine(
+                df, pd.to_datetime(start_date), pd.to_datetime(end_date), w_d, w_p, w_g,
+                store=store,
+                resolution=None if resolution == "auto" else resolution,
+                dimension=None if dimension == "Aucun" else dimension
+            )
+            if chart is not None:
+                st.altair_chart(chart, use_container_width=True)
+            else:
+                st.warning("⚠️ Aucun rendement trouvé sur cette période.")
     else:
         st.warning("Veuillez d'abord importer un fichier et choisir une période dans la page 1.")
 
@@ -159,25 +314,60 @@ elif page == pages[2]:
 elif page == pages[3]:
     st.title("🔎 Recherche d'un employé")
 
-    if "df" in st.session_state:
-        df = st.session_state.df
+    if data_ready():
         start_date, end_date = st.session_state.start_date, st.session_state.end_date
         st.info(f"Période sélectionnée : {start_date} → {end_date}")
 
-        matricule = st.text_input("Entrer le matricule employé")
-        if matricule:
-            fig = plot_employee_scores_daily(df, matricule, pd.to_datetime(start_date), pd.to_datetime(end_date))
-            if fig:
-                st.pyplot(fig)
+        if use_duckdb:
+            con = st.session_state.duckdb_con
+            index = st.session_state.employee_directory
+        else:
+            index = st.session_state.employee_index
+        recherche = st.text_input("Entrer le matricule ou le nom de l'employé")
+        if recherche:
+            resultats = index.search(recherche)
+            if not resultats:
+                st.warning("Aucun employé ne correspond à cette recherche.")
             else:
-                st.warning("Aucune donnée pour ce matricule sur la période.")
+                matricule = st.selectbox("Employé", resultats, format_func=index.label)
 
-            st.markdown("#### Tâches effectuées par cet employé sur la période")
-            mask = (df['Mat'] == matricule) & (df['Date'] >= pd.to_datetime(start_date)) & (df['Date'] <= pd.to_datetime(end_date))
-            df_emp = df.loc[mask]
-            if not df_emp.empty:
-                st.dataframe(df_emp[['Date', 'Opération', 'Produit', 'Qte_Prod', 'Travail_en_minutes']], use_container_width=True)
-            else:
-                st.info("Aucune tâche trouvée pour cet employé sur la période.")
+                if use_duckdb:
+                    df_daily = employee_daily_scores(con, [matricule], start_date, end_date)
+                else:
+                    df_daily = index.daily_scores(matricule, start_date, end_date)
+                if not df_daily.empty:
+                    st.pyplot(plot_daily_scores(df_daily, index.label(matricule)))
+                else:
+                    st.warning("Aucune donnée pour ce matricule sur la période.")
+
+                st.markdown("#### Tâches effectuées par cet employé sur la période")
+                if use_duckdb:
+                    df_emp = employee_tasks(con, matricule, start_date, end_date)
+                else:
+                    df_emp = index.tasks(matricule, start_date, end_date)
+                if not df_emp.empty:
+                    st.dataframe(df_emp, use_container_width=True)
+                else:
+                    st.info("Aucune tâche trouvée pour cet employé sur la période.")
     else:
         st.warning("Veuillez d'abord importer un fichier et choisir une période dans la page 1.")
+
+# --- Contenu de l'historique Parquet (affiché après l'ingestion éventuelle du fichier courant) ---
+if use_duckdb:
+    with st.sidebar.expander("🗂️ Contenu de l'historique"):
+        history = list_history(parquet_dir)
+        if history.empty:
+            st.caption("Historique vide.")
+        else:
+            st.dataframe(history.drop(columns="Fichier"), use_container_width=True, hide_index=True)
+            sources = dict(zip(history["Fichier"], history["Source"]))
+            to_remove = st.multiselect("Fichiers à retirer", list(sources), format_func=sources.get)
+            col1, col2 = st.columns(2)
+            if col1.button("Retirer", disabled=not to_remove):
+                remove_from_history(parquet_dir, to_remove)
+                reset_duckdb_state()
+                st.rerun()
+            if col2.button("Vider l'historique"):
+                remove_from_history(parquet_dir)
+                reset_duckdb_state()
+                st.rerun()
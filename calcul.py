@@ -6,19 +6,26 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 
-def calculate_global_scores(df, alpha=0.4, min_working_days=3):
+def calculate_base_scores(df, mult_peu_donnees=1.8, mult_cv_eleve=1.3, mult_standard=1.1,
+                          min_observations=10, seuil_cv=0.4, tolerance_min=0.5, tolerance_max=1.5):
     """
-    Calcule les scores globaux de performance à partir d'un DataFrame d'activité,
-    avec détection des fraudes basée sur des seuils min et max pour Qte/h.
+    Calcule les scores de durée et de production (journaliers, mensuels, annuels)
+    ainsi que l'indicateur de fraude, sans les scores globaux pondérés.
 
     Args:
-        df (pd.DataFrame): Données d'activité avec colonnes attendues.
-        alpha (float): Coefficient pour pondérer les scores (non utilisé ici).
-        min_working_days (int): Nombre minimum de jours travaillés (non utilisé ici).
+        df (pd.DataFrame): Données d'activité avec colonnes attendues (non modifié).
+        mult_peu_donnees (float): Multiplicateur de la moyenne si moins de `min_observations` pointages.
+        mult_cv_eleve (float): Multiplicateur de la moyenne si le coefficient de variation dépasse `seuil_cv`.
+        mult_standard (float): Multiplicateur de la moyenne dans les autres cas.
+        min_observations (int): Nombre de pointages en dessous duquel le couple est jugé peu renseigné.
+        seuil_cv (float): Coefficient de variation au-delà duquel le couple est jugé dispersé.
+        tolerance_min (float): Facteur appliqué au q10 pour le seuil de fraude bas.
+        tolerance_max (float): Facteur appliqué au q90 pour le seuil de fraude haut.
 
     Returns:
-        pd.DataFrame: DataFrame enrichi avec les scores calculés et indicateur de fraude.
+        pd.DataFrame: Nouveau DataFrame enrichi des scores de base et de l'indicateur de fraude.
     """
+    df = df.copy()
 
     # -----------------------------
     # 1. Ajouter Mois et Année
@@ -93,9 +100,9 @@ def calculate_global_scores(df, alpha=0.4, min_working_days=3):
     group_stats['cv'] = group_stats['std'] / group_stats['mean'].replace(0, np.nan)
     group_stats['Seuil_bon_rendement'] = group_stats.apply(
         lambda row: np.nan if pd.isna(row['mean']) or row['mean'] == 0 else
-        row['mean'] * 1.8 if row['count'] < 10 else
-        row['mean'] * 1.3 if row['cv'] > 0.4 else
-        row['mean'] * 1.1,
+        row['mean'] * mult_peu_donnees if row['count'] < min_observations else
+        row['mean'] * mult_cv_eleve if row['cv'] > seuil_cv else
+        row['mean'] * mult_standard,
         axis=1
     )
     df = df.merge(group_stats[['Opération', 'Produit', 'Seuil_bon_rendement']], on=['Opération', 'Produit'], how='left')
@@ -124,8 +131,8 @@ def calculate_global_scores(df, alpha=0.4, min_working_days=3):
         q10=lambda x: x.quantile(0.10),
         q90=lambda x: x.quantile(0.90)
     ).reset_index()
-    seuils_fraude['Seuil_min'] = seuils_fraude['q10'] * 0.5  # tolérance bas
-    seuils_fraude['Seuil_max'] = seuils_fraude['q90'] * 1.5  # tolérance haut
+    seuils_fraude['Seuil_min'] = seuils_fraude['q10'] * tolerance_min  # tolérance bas
+    seuils_fraude['Seuil_max'] = seuils_fraude['q90'] * tolerance_max  # tolérance haut
 
     df = df.merge(seuils_fraude[['Opération', 'Produit', 'Seuil_min', 'Seuil_max']],
                   on=['Opération', 'Produit'], how='left')
@@ -153,11 +160,48 @@ def calculate_global_scores(df, alpha=0.4, min_working_days=3):
     df['score_production_mensuel'] = df.groupby(['Mat', 'Année', 'Mois'])['score_production_journalier'].transform('mean').clip(upper=100)
     df['score_production_annuel'] = df.groupby(['Mat', 'Année'])['score_production_journalier'].transform('mean').clip(upper=100)
 
+    return df
+
+
+def combine_global_scores(df, poids_production=0.7, poids_duree=0.3):
+    """
+    Combine les scores de production et de durée en scores globaux pondérés.
+
+    Args:
+        df (pd.DataFrame): Sortie de `calculate_base_scores` (non modifiée).
+        poids_production (float): Poids du score de production.
+        poids_duree (float): Poids du score de durée.
+
+    Returns:
+        pd.DataFrame: Nouveau DataFrame avec les colonnes score_global_*.
+    """
+    df = df.copy()
+
     # -----------------------------
     # 14. Scores globaux
     # -----------------------------
-    df['score_global_journalier'] = (0.7 * df['score_production_journalier'] + 0.3 * df['score_duree']).clip(upper=100)
-    df['score_global_mensuel'] = (0.7 * df['score_production_mensuel'] + 0.3 * df['score_duree_mensuel']).clip(upper=100)
-    df['score_global_annuel'] = (0.7 * df['score_production_annuel'] + 0.3 * df['score_duree_annuel']).clip(upper=100)
+    df['score_global_journalier'] = (poids_production * df['score_production_journalier'] + poids_duree * df['score_duree']).clip(upper=100)
+    df['score_global_mensuel'] = (poids_production * df['score_production_mensuel'] + poids_duree * df['score_duree_mensuel']).clip(upper=100)
+    df['score_global_annuel'] = (poids_production * df['score_production_annuel'] + poids_duree * df['score_duree_annuel']).clip(upper=100)
 
     return df
+
+
+def calculate_global_scores(df, alpha=0.4, min_working_days=3, poids_production=0.7, poids_duree=0.3, **seuils):
+    """
+    Calcule les scores globaux de performance à partir d'un DataFrame d'activité,
+    avec détection des fraudes basée sur des seuils min et max pour Qte/h.
+
+    Args:
+        df (pd.DataFrame): Données d'activité avec colonnes attendues.
+        alpha (float): Coefficient pour pondérer les scores (non utilisé ici).
+        min_working_days (int): Nombre minimum de jours travaillés (non utilisé ici).
+        poids_production (float): Poids du score de production dans les scores globaux.
+        poids_duree (float): Poids du score de durée dans les scores globaux.
+        **seuils: Paramètres de seuils transmis à `calculate_base_scores`.
+
+    Returns:
+        pd.DataFrame: DataFrame enrichi avec les scores calculés et indicateur de fraude.
+    """
+    df = calculate_base_scores(df, **seuils)
+    return combine_global_scores(df, poids_production, poids_duree)
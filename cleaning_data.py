@@ -16,6 +16,15 @@ def clean_mat(val):
     if isinstance(val, float) and val.is_integer(): return str(int(val))
     return str(val).strip()
 
+def normalize_mat(val):
+    # Clé de recherche d'un matricule : même nettoyage que clean_mat, insensible à la casse
+    return clean_mat(val).upper()
+
+def normalize_name(val):
+    # Clé de recherche d'un nom : minuscules sans accents ni espaces superflus
+    if pd.isna(val): return ""
+    return " ".join(clean_string(str(val)).split())
+
 # Data loading and initial cleaning
 def load_and_clean_data(file_path):
     if file_path.name.endswith('.csv'):
@@ -0,0 +1,398 @@
+import glob
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pyarrow.parquet as pq
+
+from cleaning_data import load_and_clean_data
+from pipeline import DEFAULT_PARAMS
+from rendement_usine import DIMENSIONS, SCORE_COLS
+
+
+# Tables intermédiaires de compute_scores, supprimées une fois `scores` matérialisée
+INTERMEDIATE_TABLES = [
+    "base", "daily_duration", "daily_duration_scores", "monthly_duration",
+    "annual_duration", "travail", "seuils", "scores_base"
+]
+
+
+def _sql_string(value):
+    # Littéral SQL entre apostrophes, apostrophes internes doublées
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# ---------------------------
+# Connexion et ingestion
+# ---------------------------
+def connect(database=":memory:", temp_directory="duckdb_tmp", memory_limit="2GB", threads=None):
+    """
+    Ouvre une connexion DuckDB locale (aucun serveur) qui déborde sur disque
+    dans `temp_directory` lorsque `memory_limit` est atteint.
+    """
+    os.makedirs(temp_directory, exist_ok=True)
+    con = duckdb.connect(database)
+    con.execute(f"SET temp_directory = {_sql_string(temp_directory)}")
+    con.execute(f"SET memory_limit = {_sql_string(memory_limit)}")
+    con.execute("SET preserve_insertion_order = false")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    return con
+
+
+def _content_digest(df):
+    # Empreinte du contenu nettoyé, indépendante du nom et du format du fichier source
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.md5(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def ingest_file(file_path, parquet_dir):
+    """
+    Nettoie un fichier de pointages (.csv ou .xlsx) et l'ajoute au dossier Parquet.
+    Chaque fichier est chargé seul : l'historique complet n'est jamais en mémoire.
+
+    Le fichier Parquet est nommé `<empreinte>__<nom>.parquet` d'après le contenu nettoyé :
+    un contenu déjà présent, même importé sous un autre nom, n'est pas ajouté une seconde fois.
+
+    Returns:
+        tuple: (chemin du fichier Parquet, True si le contenu a été ajouté)
+    """
+    if isinstance(file_path, (str, os.PathLike)):
+        # load_and_clean_data lit `file_path.name` : un chemin brut est converti en Path
+        file_path = Path(file_path)
+    os.makedirs(parquet_dir, exist_ok=True)
+    df = load_and_clean_data(file_path)
+    digest = _content_digest(df)
+
+    existing = glob.glob(os.path.join(glob.escape(parquet_dir), f"{digest}__*.parquet"))
+    if existing:
+        return existing[0], False
+
+    stem = Path(file_path.name).stem
+    output_path = os.path.join(parquet_dir, f"{digest}__{stem}.parquet")
+    df.to_parquet(output_path, index=False)
+    return output_path, True
+
+
+def history_files(parquet_dir):
+    """
+    Fichiers Parquet de l'historique, triés par nom.
+    """
+    if not os.path.isdir(parquet_dir):
+        return []
+    return sorted(f for f in os.listdir(parquet_dir) if f.endswith(".parquet"))
+
+
+def list_history(parquet_dir):
+    """
+    Contenu de l'historique : fichier d'origine, empreinte, nombre de lignes et date d'ajout.
+    """
+    rows = []
+    for filename in history_files(parquet_dir):
+        path = os.path.join(parquet_dir, filename)
+        digest, _, stem = filename[:-len(".parquet")].partition("__")
+        rows.append({
+            'Fichier': filename,
+            'Source': stem or digest,
+            'Empreinte': digest if stem else "",
+            'Lignes': pq.ParquetFile(path).metadata.num_rows,
+            'Ajouté le': datetime.fromtimestamp(os.path.getmtime(path)),
+        })
+    return pd.DataFrame(rows, columns=['Fichier', 'Source', 'Empreinte', 'Lignes', 'Ajouté le'])
+
+
+def remove_from_history(parquet_dir, filenames=None):
+    """
+    Supprime les fichiers donnés de l'historique (tout l'historique si `filenames` vaut None).
+
+    Returns:
+        int: Nombre de fichiers supprimés.
+    """
+    present = history_files(parquet_dir)
+    targets = present if filenames is None else [f for f in filenames if f in present]
+    for filename in targets:
+        os.remove(os.path.join(parquet_dir, filename))
+    return len(targets)
+
+
+# ---------------------------
+# Scoring SQL
+# ---------------------------
+def _clip_100(expr):
+    # Équivalent de .clip(upper=100) : les NULL (NaN) sont conservés
+    return f"CASE WHEN {expr} > 100 THEN 100 ELSE {expr} END"
+
+
+def _min_max_100(col, partition):
+    # Équivalent de MinMaxScaler((0, 100)) par groupe (0 si le groupe est constant)
+    mn = f"min({col}) OVER (PARTITION BY {partition})"
+    mx = f"max({col}) OVER (PARTITION BY {partition})"
+    return f"CASE WHEN {mx} = {mn} THEN 0 ELSE ({col} - {mn}) * 100.0 / ({mx} - {mn}) END"
+
+
+def compute_scores(con, parquet_path, **params):
+    """
+    Exécute le filtrage et le calcul des scores de `calculate_global_scores`
+    en SQL sur les fichiers Parquet et matérialise la table `scores`.
+
+    Args:
+        con: Connexion retournée par `connect`.
+        parquet_path (str): Fichier, dossier ou motif glob des fichiers Parquet.
+        **params: Paramètres du pipeline (voir pipeline.DEFAULT_PARAMS).
+
+    Returns:
+        int: Nombre de lignes de la table `scores`.
+    """
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Paramètres inconnus : {sorted(unknown)}")
+    p = {**DEFAULT_PARAMS, **params}
+
+    if os.path.isdir(parquet_path):
+        if not history_files(parquet_path):
+            raise ValueError(f"Aucun fichier Parquet dans {parquet_path}")
+        parquet_path = os.path.join(parquet_path, "*.parquet")
+
+    # 1. Filtrage critique et jours de présence
+    # (exclude_employees_based_on_exclusive_couples n'enlève aucune ligne : étape ignorée)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE base AS
+        WITH critique AS (
+            SELECT *, year(Date) AS "Année", month(Date) AS Mois
+            FROM read_parquet({_sql_string(parquet_path)})
+            WHERE Date IS NOT NULL AND Mat IS NOT NULL AND Nom_Emp IS NOT NULL
+              AND "Opération" IS NOT NULL AND Produit IS NOT NULL
+              AND Qte_Prod IS NOT NULL AND Travail_en_minutes IS NOT NULL
+        ),
+        presents AS (
+            SELECT Mat FROM critique GROUP BY Mat
+            HAVING count(DISTINCT Date) >= {int(p['seuil_jours'])}
+        )
+        SELECT * FROM critique SEMI JOIN presents USING (Mat)
+    """)
+
+    # 2. Durée journalière et scores de durée
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE daily_duration AS
+        WITH couples AS (
+            SELECT Mat, Date, count(*) AS nb_op_produit
+            FROM (SELECT DISTINCT Mat, Date, "Opération", Produit FROM base)
+            GROUP BY Mat, Date
+        ),
+        travail AS (
+            SELECT Mat, Date, sum(Travail_en_minutes) AS Travail_en_minutes
+            FROM base GROUP BY Mat, Date
+        )
+        SELECT Mat, Date, travail.Travail_en_minutes + 60 * nb_op_produit AS Duree_totale_jour
+        FROM travail JOIN couples USING (Mat, Date)
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE daily_duration_scores AS
+        SELECT Mat, Date, Duree_totale_jour, {_min_max_100('Duree_totale_jour', 'Date')} AS score_duree
+        FROM daily_duration
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE monthly_duration AS
+        SELECT Mat, "Année", Mois, {_min_max_100('mean_duration', '"Année", Mois')} AS score_duree_mensuel
+        FROM (
+            SELECT Mat, "Année", Mois, coalesce(avg(d.Duree_totale_jour), 0) AS mean_duration
+            FROM base JOIN daily_duration d USING (Mat, Date)
+            GROUP BY Mat, "Année", Mois
+        )
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE annual_duration AS
+        SELECT Mat, "Année", {_min_max_100('mean_duration', '"Année"')} AS score_duree_annuel
+        FROM (
+            SELECT Mat, "Année", coalesce(avg(d.Duree_totale_jour), 0) AS mean_duration
+            FROM base JOIN daily_duration d USING (Mat, Date)
+            GROUP BY Mat, "Année"
+        )
+    """)
+
+    # 3. Qte/h et seuils par couple Opération/Produit
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE travail AS
+        SELECT *, (Qte_Prod * 60.0) / (Travail_en_minutes + 60) AS "Qte/h"
+        FROM base WHERE Travail_en_minutes > 0
+    """)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE seuils AS
+        WITH stats AS (
+            SELECT "Opération", Produit,
+                   count(*) AS n,
+                   count(DISTINCT Mat) AS nb_employes,
+                   avg("Qte/h") AS moyenne,
+                   stddev_samp("Qte/h") AS ecart_type,
+                   quantile_cont("Qte/h", 0.10) AS q10,
+                   quantile_cont("Qte/h", 0.90) AS q90
+            FROM travail GROUP BY "Opération", Produit
+        ),
+        bon AS (
+            SELECT *,
+                   CASE
+                       WHEN moyenne IS NULL OR moyenne = 0 THEN NULL
+                       WHEN n < {int(p['min_observations'])} THEN moyenne * {float(p['mult_peu_donnees'])}
+                       WHEN ecart_type / nullif(moyenne, 0) > {float(p['seuil_cv'])} THEN moyenne * {float(p['mult_cv_eleve'])}
+                       ELSE moyenne * {float(p['mult_standard'])}
+                   END AS Seuil_bon_rendement
+            FROM stats
+        )
+        SELECT "Opération", Produit,
+               nb_employes = 1 AS exclusif,
+               CASE WHEN nb_employes = 1 AND q90 IS NOT NULL THEN q90 ELSE Seuil_bon_rendement END AS Seuil_utilise,
+               q10 * {float(p['tolerance_min'])} AS Seuil_min,
+               q90 * {float(p['tolerance_max'])} AS Seuil_max
+        FROM bon
+    """)
+
+    # 4. Scores par ligne
+    score_prod = (
+        'CASE WHEN s.Seuil_utilise = 0 THEN (CASE WHEN t."Qte/h" > 0 THEN 100 END) '
+        'ELSE t."Qte/h" / s.Seuil_utilise * 100 END'
+    )
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE scores_base AS
+        SELECT t.*, s.exclusif, s.Seuil_utilise, s.Seuil_min, s.Seuil_max,
+               coalesce(t."Qte/h" < s.Seuil_min OR t."Qte/h" > s.Seuil_max, false) AS fraude,
+               {_clip_100(f'({score_prod})')} AS score_production_journalier,
+               d.score_duree, m.score_duree_mensuel, a.score_duree_annuel
+        FROM travail t
+        LEFT JOIN seuils s USING ("Opération", Produit)
+        LEFT JOIN daily_duration_scores d USING (Mat, Date)
+        LEFT JOIN monthly_duration m USING (Mat, "Année", Mois)
+        LEFT JOIN annual_duration a USING (Mat, "Année")
+    """)
+
+    w_p, w_d = float(p['poids_production']), float(p['poids_duree'])
+    prod_mensuel = _clip_100('avg(score_production_journalier) OVER (PARTITION BY Mat, "Année", Mois)')
+    prod_annuel = _clip_100('avg(score_production_journalier) OVER (PARTITION BY Mat, "Année")')
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE scores AS
+        SELECT *,
+               {_clip_100(f'({w_p} * score_production_journalier + {w_d} * score_duree)')} AS score_global_journalier,
+               {_clip_100(f'({w_p} * score_production_mensuel + {w_d} * score_duree_mensuel)')} AS score_global_mensuel,
+               {_clip_100(f'({w_p} * score_production_annuel + {w_d} * score_duree_annuel)')} AS score_global_annuel
+        FROM (
+            SELECT *,
+                   {prod_mensuel} AS score_production_mensuel,
+                   {prod_annuel} AS score_production_annuel
+            FROM scores_base
+        )
+    """)
+    for table in INTERMEDIATE_TABLES:
+        con.execute(f"DROP TABLE IF EXISTS {table}")
+
+    return con.execute("SELECT count(*) FROM scores").fetchone()[0]
+
+
+# ---------------------------
+# Tables agrégées pour le dashboard
+# ---------------------------
+def employee_count(con):
+    """
+    Nombre d'employés retenus dans la table `scores` (page 1).
+    """
+    return con.execute("SELECT count(DISTINCT upper(Mat)) FROM scores").fetchone()[0]
+
+
+def scores_preview(con, limit=20):
+    """
+    Premières lignes de la table `scores` (page 1).
+    """
+    return con.execute(f"SELECT * FROM scores LIMIT {int(limit)}").df()
+
+
+def employee_period_scores(con, start_date, end_date):
+    """
+    Scores moyens par employé sur la période (équivalent de generate_scores_between_dates).
+    """
+    df_scores = con.execute("""
+        SELECT upper(trim(CAST(Mat AS VARCHAR))) AS Mat,
+               lower(trim(CAST(Nom_Emp AS VARCHAR))) AS Nom_Emp,
+               avg(coalesce(score_duree_annuel, 0)) AS score_duree_periode,
+               avg(coalesce(score_production_annuel, 0)) AS score_production_periode,
+               avg(coalesce(score_global_annuel, 0)) AS score_global_periode
+        FROM scores
+        WHERE Date BETWEEN ? AND ?
+        GROUP BY 1, 2
+        ORDER BY score_global_periode DESC
+    """, [pd.to_datetime(start_date), pd.to_datetime(end_date)]).df()
+    df_scores['Nom_Emp'] = df_scores['Nom_Emp'].str.title()
+    return df_scores
+
+
+def employee_mean_scores(con, start_date, end_date):
+    """
+    Score global journalier moyen par employé sur la période (page 2).
+    """
+    return con.execute("""
+        SELECT upper(Mat) AS Mat, avg(score_global_journalier) AS score_global_journalier
+        FROM scores
+        WHERE Date BETWEEN ? AND ?
+        GROUP BY 1
+        ORDER BY score_global_journalier DESC
+    """, [pd.to_datetime(start_date), pd.to_datetime(end_date)]).df()
+
+
+def employee_daily_scores(con, matricules, start_date, end_date):
+    """
+    Scores journaliers moyens par employé et par date pour les matricules normalisés donnés (pages 2 et 4).
+    """
+    return con.execute("""
+        SELECT upper(Mat) AS Mat, Date,
+               avg(score_duree) AS score_duree,
+               avg(score_production_journalier) AS score_production_journalier,
+               avg(score_global_journalier) AS score_global_journalier
+        FROM scores
+        WHERE list_contains(?, upper(Mat)) AND Date BETWEEN ? AND ?
+        GROUP BY 1, Date
+        ORDER BY Mat, Date
+    """, [list(matricules), pd.to_datetime(start_date), pd.to_datetime(end_date)]).df()
+
+
+def employee_tasks(con, matricule, start_date, end_date):
+    """
+    Tâches d'un employé (matricule normalisé) sur la période (page 4).
+    """
+    return con.execute("""
+        SELECT Date, "Opération", Produit, Qte_Prod, Travail_en_minutes
+        FROM scores
+        WHERE upper(Mat) = ? AND Date BETWEEN ? AND ?
+        ORDER BY Date
+    """, [matricule, pd.to_datetime(start_date), pd.to_datetime(end_date)]).df()
+
+
+def employee_directory(con):
+    """
+    Couples matricule normalisé / nom avec leur nombre de lignes (annuaire de la page 4).
+    """
+    return con.execute("""
+        SELECT upper(Mat) AS mat_key, Nom_Emp, count(*) AS n
+        FROM scores
+        GROUP BY 1, 2
+    """).df()
+
+
+def factory_daily_sums(con, dimension=None):
+    """
+    Sommes journalières des scores pour le rendement usine (page 3), au format attendu
+    par rendement_usine.yield_store_from_sums.
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Dimension inconnue : {dimension}")
+    keys = f', "{dimension}"' if dimension else ''
+    sums = ", ".join(f"sum({col}) AS {col}" for col in SCORE_COLS)
+    not_null = " AND ".join(f"{col} IS NOT NULL" for col in SCORE_COLS)
+    daily = con.execute(f"""
+        SELECT Date{keys}, {sums}, count(*) AS n
+        FROM scores
+        WHERE {not_null}
+        GROUP BY Date{keys}
+        ORDER BY Date{keys}
+    """).df()
+    daily['Date'] = pd.to_datetime(daily['Date'])
+    return daily
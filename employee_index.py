@@ -0,0 +1,176 @@
+import bisect
+import difflib
+
+import numpy as np
+import pandas as pd
+
+from cleaning_data import normalize_mat, normalize_name
+
+
+TASK_COLS = ['Date', 'Opération', 'Produit', 'Qte_Prod', 'Travail_en_minutes']
+DAILY_SCORE_COLS = ['score_duree', 'score_production_journalier', 'score_global_journalier']
+
+
+def _ranges(keys):
+    # {clé: (début, fin)} pour un tableau de clés trié
+    ranges = {}
+    start = 0
+    for i in range(1, len(keys) + 1):
+        if i == len(keys) or keys[i] != keys[start]:
+            ranges[keys[start]] = (start, i)
+            start = i
+    return ranges
+
+
+def _date_slice(df, start, stop, date_debut, date_fin):
+    # Lignes [start, stop) triées par Date, restreintes à la période par recherche dichotomique
+    dates = df['Date'].to_numpy()[start:stop]
+    lo = start + dates.searchsorted(pd.to_datetime(date_debut).to_datetime64(), side='left')
+    hi = start + dates.searchsorted(pd.to_datetime(date_fin).to_datetime64(), side='right')
+    return df.iloc[lo:hi]
+
+
+class EmployeeDirectory:
+    """
+    Recherche d'employés par matricule ou par nom, construite à partir des couples
+    matricule normalisé / nom (colonnes mat_key, Nom_Emp et nombre de lignes n).
+    """
+
+    def __init__(self, names):
+        self.mats = sorted(names['mat_key'].unique())
+
+        # Nom affiché : nom le plus fréquent de l'employé
+        names = names.sort_values(['mat_key', 'n', 'Nom_Emp'], ascending=[True, False, True])
+        self.labels = (
+            names.drop_duplicates('mat_key').set_index('mat_key')['Nom_Emp']
+            .astype(str).str.strip().str.title().to_dict()
+        )
+
+        # Noms complets et mots des noms (sans accents) -> matricules
+        self.name_to_mats = {}
+        for mat, name in zip(names['mat_key'], names['Nom_Emp'].map(normalize_name)):
+            if not name:
+                continue
+            for key in {name, *name.split()}:
+                self.name_to_mats.setdefault(key, set()).add(mat)
+        self.name_keys = sorted(self.name_to_mats)
+
+    def label(self, mat):
+        return f"{mat} — {self.labels.get(mat, '')}"
+
+    def _prefix(self, keys, prefix):
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            yield keys[i]
+            i += 1
+
+    def search(self, query, limit=10):
+        """
+        Retourne les matricules correspondant à `query` (matricule ou nom), dans l'ordre :
+        matricule exact, préfixe de matricule, préfixe de nom, puis correspondances approchées.
+        """
+        mat_query, name_query = normalize_mat(query), normalize_name(query)
+        if not mat_query and not name_query:
+            return []
+
+        results = []
+
+        def add(mats):
+            # Ajoute dans l'ordre reçu ; retourne True dès que `limit` est atteint
+            for mat in mats:
+                if len(results) >= limit:
+                    return True
+                if mat not in results:
+                    results.append(mat)
+            return len(results) >= limit
+
+        def add_names(keys):
+            # `keys` est parcouru paresseusement : arrêt dès que `limit` est atteint
+            for key in keys:
+                if add(sorted(self.name_to_mats[key])):
+                    return True
+            return False
+
+        if mat_query:
+            if mat_query in self.labels and add([mat_query]):
+                return results
+            # self.mats est trié : le générateur de préfixes est déjà dans l'ordre
+            if add(self._prefix(self.mats, mat_query)):
+                return results
+        if name_query and add_names(self._prefix(self.name_keys, name_query)):
+            return results
+
+        if mat_query and add(difflib.get_close_matches(mat_query, self.mats, n=limit, cutoff=0.6)):
+            return results
+        if name_query:
+            add_names(difflib.get_close_matches(name_query, self.name_keys, n=limit, cutoff=0.6))
+
+        return results
+
+
+class EmployeeIndex(EmployeeDirectory):
+    """
+    Annuaire des employés construit une fois à partir des scores de base
+    (étape 'base_scores' du pipeline), indépendants des poids des scores globaux.
+
+    Les lignes sont triées par matricule normalisé puis par Date : chaque employé
+    correspond à une plage contiguë de lignes, ce qui permet de retrouver ses tâches
+    et sa série journalière sans parcourir tout le DataFrame.
+    Quand les poids changent, seul score_global_journalier est recalculé (set_global_scores).
+    """
+
+    def __init__(self, df):
+        # Seules les colonnes utiles sont copiées : le DataFrame scoré complet reste dans le pipeline
+        base_cols = [col for col in DAILY_SCORE_COLS if col != 'score_global_journalier']
+        rows = df[['Nom_Emp'] + TASK_COLS + base_cols].assign(
+            Date=pd.to_datetime(df['Date']),
+            mat_key=df['Mat'].map(normalize_mat),
+            position=np.arange(len(df))
+        )
+        rows = rows.sort_values(['mat_key', 'Date'], kind='stable').reset_index(drop=True)
+
+        # Position de chaque ligne triée dans `df` et numéro de son couple (matricule, Date)
+        self._order = rows['position'].to_numpy()
+        groups = rows.groupby(['mat_key', 'Date'])
+        self._daily_groups = groups.ngroup().to_numpy()
+
+        daily = groups[base_cols].mean().reset_index()
+        self.daily = daily.assign(score_global_journalier=np.nan)
+        self.daily_ranges = _ranges(daily['mat_key'].tolist())
+
+        self.rows = rows[['mat_key', 'Nom_Emp'] + TASK_COLS]
+        self.row_ranges = _ranges(self.rows['mat_key'].tolist())
+
+        super().__init__(self.rows.groupby(['mat_key', 'Nom_Emp']).size().reset_index(name='n'))
+
+        if 'score_global_journalier' in df:
+            self.set_global_scores(df)
+
+    def set_global_scores(self, scores):
+        """
+        Met à jour la moyenne journalière de score_global_journalier à partir de `scores`,
+        DataFrame aligné ligne à ligne sur celui de la construction (sortie de l'étape 'scores').
+        """
+        if len(scores) != len(self._order):
+            raise ValueError("Les scores ne correspondent pas aux lignes de l'annuaire.")
+        values = pd.Series(scores['score_global_journalier'].to_numpy()[self._order])
+        means = values.groupby(self._daily_groups).mean().reindex(range(len(self.daily)))
+        self.daily = self.daily.assign(score_global_journalier=means.to_numpy())
+
+    def tasks(self, mat, date_debut, date_fin):
+        """
+        Tâches de l'employé `mat` (matricule normalisé) sur la période.
+        """
+        if mat not in self.row_ranges:
+            return self.rows.iloc[0:0][TASK_COLS]
+        start, stop = self.row_ranges[mat]
+        return _date_slice(self.rows, start, stop, date_debut, date_fin)[TASK_COLS]
+
+    def daily_scores(self, mat, date_debut, date_fin):
+        """
+        Série des scores journaliers moyens de l'employé `mat` sur la période.
+        """
+        if mat not in self.daily_ranges:
+            return self.daily.iloc[0:0]
+        start, stop = self.daily_ranges[mat]
+        return _date_slice(self.daily, start, stop, date_debut, date_fin)
@@ -2,6 +2,8 @@ import pandas as pd
 import os
 import matplotlib.pyplot as plt
 
+from cleaning_data import normalize_mat
+
 def generate_scores_between_dates(df, start_date, end_date, output_dir):
     # Conversion des dates en datetime
     df['Date'] = pd.to_datetime(df['Date'])
@@ -15,7 +17,7 @@ def generate_scores_between_dates(df, start_date, end_date, output_dir):
         return
 
     # Nettoyage des colonnes
-    df_filtered['Mat'] = df_filtered['Mat'].astype(str).str.strip().str.upper()
+    df_filtered['Mat'] = df_filtered['Mat'].apply(normalize_mat)
     df_filtered['Nom_Emp'] = df_filtered['Nom_Emp'].astype(str).str.strip().str.title()
 
     # Colonnes d'origine attendues
@@ -81,7 +83,12 @@ def plot_employee_scores_daily(df, matricule, date_debut, date_fin):
         'score_production_journalier': 'mean',
         'score_global_journalier': 'mean'
     }).reset_index()
-    
+
+    return plot_daily_scores(df_daily, matricule)
+
+
+def plot_daily_scores(df_daily, matricule):
+    # Tracer une série journalière déjà agrégée (une ligne par Date)
     # Créer une figure et des axes
     fig, ax = plt.subplots(figsize=(14, 8))
 
@@ -104,41 +111,42 @@ def plot_employee_scores_daily(df, matricule, date_debut, date_fin):
 import pandas as pd
 import altair as alt
 
-def calculer_rendement_usine(df, date_debut, date_fin, w_d=0.3, w_p=0.5, w_g=0.2):
+from rendement_usine import build_yield_store, choose_resolution, rendement_series
+
+def calculer_rendement_usine(df, date_debut, date_fin, w_d=0.3, w_p=0.5, w_g=0.2,
+                             store=None, resolution=None, dimension=None):
     """
     Calcule et trace le rendement global de l'usine sur une période donnée.
     Retourne un graphique Altair interactif pour Streamlit.
-    """
-    # Vérification des poids
-    assert abs(w_d + w_p + w_g - 1.0) < 1e-6, "Les poids doivent avoir une somme de 1."
 
-    # Conversion de la colonne Date
-    df['Date'] = pd.to_datetime(df['Date'])
+    `store` (voir rendement_usine.build_yield_store) évite de reparcourir `df` :
+    le construire une fois au chargement puis le réutiliser pour chaque période ou jeu de poids.
+    La résolution (jour/semaine/mois/trimestre) est choisie selon la longueur de la période
+    si elle n'est pas fournie ; `dimension` ('Opération' ou 'Produit') ajoute une courbe par valeur.
+    """
+    if store is None:
+        store = build_yield_store(df)
 
-    # Filtrage par période
-    mask = (df['Date'] >= pd.to_datetime(date_debut)) & (df['Date'] <= pd.to_datetime(date_fin))
-    df_filtered = df.loc[mask].copy()
+    resolution = resolution or choose_resolution(date_debut, date_fin)
+    rendement = rendement_series(store, date_debut, date_fin, w_d, w_p, w_g, resolution, dimension)
 
-    if df_filtered.empty:
+    if rendement.empty:
         return None
 
-    # Calcul du score combiné
-    df_filtered['score_combine'] = (
-        w_d * df_filtered['score_duree'] +
-        w_p * df_filtered['score_production_journalier'] +
-        w_g * df_filtered['score_global_journalier']
-    )
-
-    # Moyenne quotidienne
-    rendement_journalier = df_filtered.groupby('Date')['score_combine'].mean().reset_index()
+    tooltip = [alt.Tooltip('Date:T', title='Début'), alt.Tooltip('Fin:T', title='Fin'), 'score_combine:Q', 'n:Q']
+    encoding = {}
+    if dimension:
+        encoding['color'] = alt.Color(f'{dimension}:N', title=dimension)
+        tooltip.insert(0, f'{dimension}:N')
 
     # Graphique Altair
-    chart = alt.Chart(rendement_journalier).mark_line(point=True).encode(
+    chart = alt.Chart(rendement).mark_line(point=True).encode(
         x=alt.X('Date:T', title='Date'),
         y=alt.Y('score_combine:Q', title='Score global moyen'),
-        tooltip=['Date:T', 'score_combine:Q']
+        tooltip=tooltip,
+        **encoding
     ).properties(
-        title=f"Rendement global de l'usine ({date_debut} → {date_fin})",
+        title=f"Rendement global de l'usine ({date_debut} → {date_fin}, par {resolution})",
         width=800,
         height=400
     ).interactive()  # permet zoom/hover
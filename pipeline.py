@@ -0,0 +1,167 @@
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+from cleaning_data import (
+    load_and_clean_data,
+    filter_critical_data,
+    identify_exclusive_operations,
+    exclude_employees_based_on_exclusive_couples,
+    filter_by_presence_days
+)
+from calcul import calculate_base_scores, combine_global_scores
+
+
+# Valeurs par défaut de tous les paramètres du pipeline
+DEFAULT_PARAMS = {
+    # Nettoyage
+    'seuil_pointages': 1,
+    'seuil_jours': 3,
+    # Seuils de rendement
+    'mult_peu_donnees': 1.8,
+    'mult_cv_eleve': 1.3,
+    'mult_standard': 1.1,
+    'min_observations': 10,
+    'seuil_cv': 0.4,
+    # Détection de fraude
+    'tolerance_min': 0.5,
+    'tolerance_max': 1.5,
+    # Pondération des scores globaux
+    'poids_production': 0.7,
+    'poids_duree': 0.3,
+}
+
+
+# ---------------------------
+# Étapes du pipeline
+# ---------------------------
+def _stage_critical(df):
+    return filter_critical_data(df)
+
+
+def _stage_exclusives(df):
+    exclusive_list, _ = identify_exclusive_operations(df)
+    return exclusive_list
+
+
+def _stage_exclusion(df, exclusive_list, seuil_pointages):
+    df, _ = exclude_employees_based_on_exclusive_couples(df, exclusive_list, seuil_pointages)
+    return df
+
+
+def _stage_presence(df, seuil_jours):
+    df, _ = filter_by_presence_days(df, seuil_jours)
+    return df
+
+
+def _stage_base_scores(df, **seuils):
+    return calculate_base_scores(df, **seuils)
+
+
+def _stage_scores(df, poids_production, poids_duree):
+    return combine_global_scores(df, poids_production, poids_duree)
+
+
+# Graphe des dépendances : étape -> (fonction, étapes amont, paramètres utilisés).
+# L'ordre de déclaration est un ordre topologique.
+STAGES = OrderedDict([
+    ('critical', (_stage_critical, ['load'], [])),
+    ('exclusives', (_stage_exclusives, ['critical'], [])),
+    ('exclusion', (_stage_exclusion, ['critical', 'exclusives'], ['seuil_pointages'])),
+    ('presence', (_stage_presence, ['exclusion'], ['seuil_jours'])),
+    ('base_scores', (_stage_base_scores, ['presence'], [
+        'mult_peu_donnees', 'mult_cv_eleve', 'mult_standard', 'min_observations',
+        'seuil_cv', 'tolerance_min', 'tolerance_max'
+    ])),
+    ('scores', (_stage_scores, ['base_scores'], ['poids_production', 'poids_duree'])),
+])
+
+
+# Nombre de résultats gardés par étape. Les étapes amont, de la taille du fichier,
+# ne gardent que le dernier résultat ; les deux dernières étapes en gardent deux
+# pour revenir sans recalcul au réglage précédent d'un seuil ou d'un poids.
+CACHE_SIZES = {
+    'load': 1,
+    'critical': 1,
+    'exclusives': 1,
+    'exclusion': 1,
+    'presence': 1,
+    'base_scores': 2,
+    'scores': 2,
+}
+
+
+def source_fingerprint(source):
+    """
+    Identifie un fichier source par son nom et son contenu (fichier uploadé)
+    ou par sa taille et sa date de modification (chemin sur disque).
+    """
+    if hasattr(source, 'getvalue'):
+        digest = hashlib.md5(source.getvalue()).hexdigest()
+        return (source.name, digest)
+    stat = os.stat(source)
+    return (str(source), stat.st_size, stat.st_mtime_ns)
+
+
+class ScoringPipeline:
+    """
+    Pipeline de scoring dont les résultats intermédiaires sont mémorisés
+    par étape selon les paramètres qui les influencent.
+
+    Modifier un poids ne recalcule que l'étape 'scores', modifier `seuil_jours`
+    repart de l'étape 'presence' sans relire ni renettoyer le fichier.
+    """
+
+    def __init__(self, loader=load_and_clean_data, cache_sizes=None):
+        self.loader = loader
+        self.cache_sizes = {**CACHE_SIZES, **(cache_sizes or {})}
+        self._cache = {name: OrderedDict() for name in ['load', *STAGES]}
+        self.results = {}
+        self.recomputed = []
+
+    def _lookup(self, stage, key, compute):
+        entries = self._cache[stage]
+        if key in entries:
+            entries.move_to_end(key)
+            return entries[key]
+        value = compute()
+        entries[key] = value
+        if len(entries) > self.cache_sizes[stage]:
+            entries.popitem(last=False)
+        self.recomputed.append(stage)
+        return value
+
+    def _load(self, source):
+        if isinstance(source, (str, os.PathLike)):
+            # Les loaders lisent `source.name` : un chemin brut est converti en Path
+            source = Path(source)
+        elif hasattr(source, 'seek'):
+            source.seek(0)
+        return self.loader(source)
+
+    def run(self, source, **params):
+        """
+        Exécute le pipeline sur `source` et retourne le DataFrame final scoré.
+
+        Les paramètres absents prennent leur valeur dans DEFAULT_PARAMS.
+        Après l'appel, `results` contient la sortie de chaque étape et
+        `recomputed` la liste des étapes effectivement recalculées.
+        """
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Paramètres inconnus : {sorted(unknown)}")
+        params = {**DEFAULT_PARAMS, **params}
+
+        self.recomputed = []
+        keys = {'load': source_fingerprint(source)}
+        results = {'load': self._lookup('load', keys['load'], lambda: self._load(source))}
+
+        for stage, (func, deps, param_names) in STAGES.items():
+            stage_params = {name: params[name] for name in param_names}
+            keys[stage] = (tuple(keys[dep] for dep in deps), tuple(sorted(stage_params.items())))
+            inputs = [results[dep] for dep in deps]
+            results[stage] = self._lookup(stage, keys[stage], lambda: func(*inputs, **stage_params))
+
+        self.results = results
+        return results['scores']
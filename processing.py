@@ -3,47 +3,38 @@ import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
 
-from cleaning_data import (
-    load_and_clean_data,
-    filter_critical_data,
-    identify_exclusive_operations,
-    exclude_employees_based_on_exclusive_couples,
-    filter_by_presence_days
-)
-from calcul import calculate_global_scores
 from functions import generate_scores_between_dates
+from pipeline import DEFAULT_PARAMS, ScoringPipeline
 
 OUTPUT_FOLDER = "outputs"
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
 
-def process_dataframe(df, output_dir, seuil_pointages=1, seuil_jours=3):
-    os.makedirs(output_dir, exist_ok=True)
-
-    st.write(f"👥 Après nettoyage : {df['Mat'].nunique()} employés")
-    
-    df = filter_critical_data(df)
-    st.write(f"🔍 Après filtrage critique : {df['Mat'].nunique()} employés")
-
-    exclusive_list, exclusive_data = identify_exclusive_operations(df)
-    st.write(f"⚠️ Nombre opérations exclusives : {len(exclusive_list)}")
-
-    df, df_exclus = exclude_employees_based_on_exclusive_couples(df, exclusive_list, seuil_pointages)
-    st.write(f"🚫 Après exclusion employés exclusives : {df['Mat'].nunique()} employés")
-
-    df, df_absents = filter_by_presence_days(df, seuil_jours)
-    st.write(f"📉 Après filtrage par jours de présence : {df['Mat'].nunique()} employés")
+def read_uploaded_file(uploaded_file):
+    file_type = uploaded_file.name.split('.')[-1].lower()
+    if file_type == "csv":
+        return pd.read_csv(uploaded_file, parse_dates=["Date"])
+    return pd.read_excel(uploaded_file, parse_dates=["Date"])
 
-    df['Mois'] = df['Date'].dt.month
-    df['Année'] = df['Date'].dt.year
 
-    df = calculate_global_scores(df)
+def report_pipeline(pipeline, output_dir):
+    """
+    Affiche les effectifs après chaque étape du dernier passage du pipeline
+    et exporte les résultats. L'export n'est refait que si une étape a été recalculée.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = pipeline.results
 
-    df.to_excel(os.path.join(output_dir, "filtredwithscores.xlsx"), index=False)
+    st.write(f"👥 Après nettoyage : {results['load']['Mat'].nunique()} employés")
+    st.write(f"🔍 Après filtrage critique : {results['critical']['Mat'].nunique()} employés")
+    st.write(f"⚠️ Nombre opérations exclusives : {len(results['exclusives'])}")
+    st.write(f"🚫 Après exclusion employés exclusives : {results['exclusion']['Mat'].nunique()} employés")
+    st.write(f"📉 Après filtrage par jours de présence : {results['presence']['Mat'].nunique()} employés")
 
-    start_date = "2024-01-01"
-    end_date = "2024-12-31"
-    generate_scores_between_dates(df, start_date, end_date, output_dir)
+    df = results['scores']
+    if pipeline.recomputed:
+        df.to_excel(os.path.join(output_dir, "filtredwithscores.xlsx"), index=False)
+        generate_scores_between_dates(df, "2024-01-01", "2024-12-31", output_dir)
 
     return df
 
@@ -90,19 +81,18 @@ st.title("📊 Analyse des employés")
 uploaded_file = st.file_uploader("Uploader un fichier Excel ou CSV", type=["xlsx", "csv"])
 
 # Paramètres
-seuil_pointages = st.slider("Seuil pointages", min_value=1, max_value=10, value=1)
-seuil_jours = st.slider("Seuil jours de présence", min_value=1, max_value=30, value=3)
+seuil_pointages = st.slider("Seuil pointages", min_value=1, max_value=10, value=DEFAULT_PARAMS['seuil_pointages'])
+seuil_jours = st.slider("Seuil jours de présence", min_value=1, max_value=30, value=DEFAULT_PARAMS['seuil_jours'])
 
-if uploaded_file is not None:
-    # Lire le fichier correctement
-    file_type = uploaded_file.name.split('.')[-1].lower()
-    if file_type == "csv":
-        df = pd.read_csv(uploaded_file, parse_dates=["Date"])
-    else:
-        df = pd.read_excel(uploaded_file, parse_dates=["Date"])
+# Pipeline mémorisé : seules les étapes dépendant d'un paramètre modifié sont recalculées
+if "pipeline" not in st.session_state:
+    st.session_state.pipeline = ScoringPipeline(loader=read_uploaded_file)
+pipeline = st.session_state.pipeline
 
+if uploaded_file is not None:
     # Traitement
-    df_result = process_dataframe(df, OUTPUT_FOLDER, seuil_pointages, seuil_jours)
+    pipeline.run(uploaded_file, seuil_pointages=seuil_pointages, seuil_jours=seuil_jours)
+    df_result = report_pipeline(pipeline, OUTPUT_FOLDER)
     st.success(f"✅ Traitement terminé - {df_result['Mat'].nunique()} employés retenus")
 
     # Aperçu
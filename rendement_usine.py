@@ -0,0 +1,119 @@
+import pandas as pd
+
+
+SCORE_COLS = ['score_duree', 'score_production_journalier', 'score_global_journalier']
+
+# Résolution -> fréquence de période pandas (None = journalier)
+RESOLUTIONS = {
+    'jour': None,
+    'semaine': 'W',
+    'mois': 'M',
+    'trimestre': 'Q',
+}
+
+DIMENSIONS = [None, 'Opération', 'Produit']
+
+
+def _daily_sums(df, keys):
+    # Seules les lignes dont les trois scores sont renseignés entrent dans la moyenne
+    # du score combiné (une combinaison contenant un NaN est ignorée par mean()).
+    df_valid = df.dropna(subset=SCORE_COLS)
+    sums = df_valid.groupby(['Date'] + keys)[SCORE_COLS].sum()
+    sums['n'] = df_valid.groupby(['Date'] + keys).size()
+    return sums.reset_index()
+
+
+def _rollup(daily, freq, keys):
+    periods = daily['Date'].dt.to_period(freq)
+    rollup = daily.assign(Date=periods.dt.start_time, Fin=periods.dt.end_time.dt.normalize())
+    return rollup.groupby(['Date', 'Fin'] + keys, as_index=False)[SCORE_COLS + ['n']].sum()
+
+
+def yield_store_from_sums(daily_sums):
+    """
+    Construit le store à partir des sommes journalières déjà calculées
+    (par exemple par duckdb_backend.factory_daily_sums).
+
+    Args:
+        daily_sums (dict): {dimension: DataFrame} avec Date, [dimension], les sommes des scores et `n`.
+
+    Returns:
+        dict: {(dimension, résolution): DataFrame} avec les colonnes Date, [Fin], [dimension],
+        les sommes des scores et le nombre de lignes `n`.
+    """
+    store = {}
+    for dimension, daily in daily_sums.items():
+        keys = [dimension] if dimension else []
+        store[(dimension, 'jour')] = daily
+        for resolution, freq in RESOLUTIONS.items():
+            if freq:
+                store[(dimension, resolution)] = _rollup(daily, freq, keys)
+    return store
+
+
+def build_yield_store(df):
+    """
+    Précalcule, une fois par jeu de scores, les sommes journalières des trois scores
+    (globales et par Opération / Produit) ainsi que leurs cumuls hebdomadaires,
+    mensuels et trimestriels (voir yield_store_from_sums).
+    """
+    df = df.assign(Date=pd.to_datetime(df['Date']))
+    return yield_store_from_sums({
+        dimension: _daily_sums(df, [dimension] if dimension else [])
+        for dimension in DIMENSIONS
+    })
+
+
+def choose_resolution(date_debut, date_fin):
+    """
+    Choisit la résolution d'affichage selon la longueur de la période.
+    """
+    nb_jours = (pd.to_datetime(date_fin) - pd.to_datetime(date_debut)).days
+    if nb_jours <= 92:
+        return 'jour'
+    if nb_jours <= 731:
+        return 'semaine'
+    if nb_jours <= 1826:
+        return 'mois'
+    return 'trimestre'
+
+
+def rendement_series(store, date_debut, date_fin, w_d=0.3, w_p=0.5, w_g=0.2, resolution=None, dimension=None):
+    """
+    Série du score combiné moyen de l'usine sur la période, obtenue par combinaison
+    linéaire des sommes précalculées (aucun recalcul ligne à ligne quand les poids changent).
+
+    Les périodes entièrement comprises dans l'intervalle sont lues dans les cumuls
+    précalculés ; seules les périodes tronquées aux bornes sont réagrégées depuis le journalier.
+    Chaque point est daté du début effectif de sa période (Date) et porte sa fin effective (Fin).
+    """
+    assert abs(w_d + w_p + w_g - 1.0) < 1e-6, "Les poids doivent avoir une somme de 1."
+    date_debut, date_fin = pd.to_datetime(date_debut), pd.to_datetime(date_fin)
+    resolution = resolution or choose_resolution(date_debut, date_fin)
+    keys = [dimension] if dimension else []
+
+    daily = store[(dimension, 'jour')]
+    daily = daily[(daily['Date'] >= date_debut) & (daily['Date'] <= date_fin)]
+
+    if resolution == 'jour':
+        series = daily.assign(Fin=daily['Date'])
+    else:
+        rollup = store[(dimension, resolution)]
+        complete = rollup[(rollup['Date'] >= date_debut) & (rollup['Fin'] <= date_fin)]
+        periods_start = daily['Date'].dt.to_period(RESOLUTIONS[resolution]).dt.start_time
+        edges = daily[~periods_start.isin(complete['Date'])]
+        series = pd.concat([complete, _rollup(edges, RESOLUTIONS[resolution], keys)], ignore_index=True)
+        # Les périodes tronquées sont bornées à l'intervalle demandé (Date = début, Fin = fin effectifs)
+        series = series.assign(
+            Date=series['Date'].clip(lower=date_debut),
+            Fin=series['Fin'].clip(upper=date_fin)
+        ).sort_values(['Date'] + keys)
+
+    series = series[keys + ['Date', 'Fin', 'n']].assign(
+        score_combine=(
+            w_d * series['score_duree'] +
+            w_p * series['score_production_journalier'] +
+            w_g * series['score_global_journalier']
+        ) / series['n']
+    )
+    return series.reset_index(drop=True)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from calcul import calculate_global_scores
+from cleaning_data import filter_critical_data, filter_by_presence_days
+
+KEYS = ['Mat', 'Date', 'Opération', 'Produit']
+
+
+def synthetic_pointages(seed=0):
+    """
+    Pointages nettoyés sur deux années : un couple exclusif, des durées nulles,
+    des valeurs manquantes et un employé sous le seuil de présence.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.to_datetime("2023-11-01") + pd.to_timedelta(rng.choice(120, size=30, replace=False), unit="D")
+    couples = [("coupe", "P1"), ("coupe", "P2"), ("couture", "P1"), ("finition", "P2")]
+    rows = []
+    for mat in ["101", "102", "103", "104", "105", "A7"]:
+        for date in rng.choice(dates, size=12, replace=False):
+            for op, prod in [couples[i] for i in rng.choice(len(couples), size=2, replace=False)]:
+                rows.append({
+                    'Date': date, 'Mat': mat, 'Nom_Emp': f"Employé {mat}", 'Opération': op, 'Produit': prod,
+                    'Qte_Prod': float(rng.integers(0, 200)), 'Travail_en_minutes': float(rng.choice([0, 30, 120, 240, 480])),
+                })
+    for date in rng.choice(dates, size=8, replace=False):
+        rows.append({
+            'Date': date, 'Mat': "101", 'Nom_Emp': "Employé 101", 'Opération': "repassage", 'Produit': "P3",
+            'Qte_Prod': float(rng.integers(1, 50)), 'Travail_en_minutes': 60.0,
+        })
+    rows.append({
+        'Date': dates[0], 'Mat': "999", 'Nom_Emp': "Absent", 'Opération': "coupe", 'Produit': "P1",
+        'Qte_Prod': 10.0, 'Travail_en_minutes': 60.0,
+    })
+    rows.append({
+        'Date': dates[1], 'Mat': "102", 'Nom_Emp': "Employé 102", 'Opération': "coupe", 'Produit': "P1",
+        'Qte_Prod': np.nan, 'Travail_en_minutes': 60.0,
+    })
+    return pd.DataFrame(rows).drop_duplicates(KEYS)
+
+
+def pandas_scores(df, seuil_jours=3, **params):
+    df = filter_critical_data(df)
+    df, _ = filter_by_presence_days(df, seuil_jours)
+    return calculate_global_scores(df, **params)
+
+
+def write_csv(df, path):
+    """
+    Écrit les pointages au format lu par load_and_clean_data (';', ISO-8859-1, dates jj/mm/aaaa).
+    """
+    df.assign(Date=df['Date'].dt.strftime("%d/%m/%Y")).to_csv(path, sep=';', encoding='ISO-8859-1', index=False)
+    return path
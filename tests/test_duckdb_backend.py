@@ -0,0 +1,107 @@
+import pytest
+
+for module in ["pandas", "numpy", "sklearn", "matplotlib", "seaborn", "duckdb", "pyarrow"]:
+    pytest.importorskip(module)
+
+import shutil
+
+import pandas as pd
+
+from cleaning_data import load_and_clean_data
+from donnees import KEYS, pandas_scores, synthetic_pointages, write_csv
+from duckdb_backend import (
+    INTERMEDIATE_TABLES,
+    compute_scores,
+    connect,
+    history_files,
+    ingest_file,
+    list_history,
+    remove_from_history
+)
+
+COMPARED_COLS = [
+    'Qte/h', 'exclusif', 'Seuil_utilise', 'Seuil_min', 'Seuil_max', 'fraude',
+    'score_duree', 'score_duree_mensuel', 'score_duree_annuel',
+    'score_production_journalier', 'score_production_mensuel', 'score_production_annuel',
+    'score_global_journalier', 'score_global_mensuel', 'score_global_annuel',
+]
+
+
+def duckdb_scores(df, tmp_path, **params):
+    df.to_parquet(tmp_path / "pointages.parquet", index=False)
+    con = connect(temp_directory=str(tmp_path / "tmp"))
+    compute_scores(con, str(tmp_path), **params)
+    return con, con.execute("SELECT * FROM scores").df()
+
+
+def assert_same_scores(expected, result):
+    assert len(expected) > 0
+    expected = expected.sort_values(KEYS).reset_index(drop=True)
+    result = result.assign(Date=pd.to_datetime(result['Date']).astype(expected['Date'].dtype))
+    result = result.sort_values(KEYS).reset_index(drop=True)
+    assert len(result) == len(expected)
+    pd.testing.assert_frame_equal(result[KEYS], expected[KEYS])
+    for col in COMPARED_COLS:
+        pd.testing.assert_series_equal(
+            result[col].astype(float), expected[col].astype(float),
+            check_names=False, rtol=1e-9, obj=col
+        )
+
+
+def test_compute_scores_matches_pandas(tmp_path):
+    df = synthetic_pointages()
+    _, result = duckdb_scores(df, tmp_path)
+    assert_same_scores(pandas_scores(df), result)
+
+
+def test_compute_scores_matches_pandas_with_custom_params(tmp_path):
+    df = synthetic_pointages(seed=1)
+    params = {
+        'mult_peu_donnees': 2.0, 'mult_cv_eleve': 1.5, 'mult_standard': 1.2, 'min_observations': 5,
+        'seuil_cv': 0.3, 'tolerance_min': 0.4, 'tolerance_max': 2.0,
+        'poids_production': 0.6, 'poids_duree': 0.4,
+    }
+    _, result = duckdb_scores(df, tmp_path, seuil_jours=5, **params)
+    assert_same_scores(pandas_scores(df, seuil_jours=5, **params), result)
+
+
+def test_compute_scores_drops_intermediate_tables(tmp_path):
+    con, _ = duckdb_scores(synthetic_pointages(), tmp_path)
+    tables = set(con.execute("SELECT table_name FROM duckdb_tables()").df()['table_name'])
+    assert tables == {"scores"}
+    assert not tables & set(INTERMEDIATE_TABLES)
+
+
+def test_ingest_file_by_path_skips_known_content(tmp_path):
+    csv_path = write_csv(synthetic_pointages(), tmp_path / "pointages_2024.csv")
+    parquet_dir = str(tmp_path / "historique")
+
+    path, added = ingest_file(str(csv_path), parquet_dir)
+    assert added and path.endswith("__pointages_2024.parquet")
+
+    # Même contenu sous un autre nom : pas de second fichier, pas de lignes comptées deux fois
+    copy_path = shutil.copy(csv_path, tmp_path / "copie.csv")
+    _, added = ingest_file(copy_path, parquet_dir)
+    assert not added
+    assert len(history_files(parquet_dir)) == 1
+
+    con = connect(temp_directory=str(tmp_path / "tmp"))
+    nb_lignes = compute_scores(con, parquet_dir)
+    assert nb_lignes == len(pandas_scores(load_and_clean_data(csv_path)))
+
+
+def test_history_listing_and_removal(tmp_path):
+    parquet_dir = str(tmp_path / "historique")
+    df = synthetic_pointages()
+    ingest_file(write_csv(df, tmp_path / "a.csv"), parquet_dir)
+    ingest_file(write_csv(df.iloc[:50], tmp_path / "b.csv"), parquet_dir)
+
+    history = list_history(parquet_dir)
+    assert sorted(history['Source']) == ["a", "b"]
+    assert sorted(history['Lignes']) == [50, len(df)]
+
+    removed = [f for f in history_files(parquet_dir) if f.endswith("__b.parquet")]
+    assert remove_from_history(parquet_dir, removed) == 1
+    assert list(list_history(parquet_dir)['Source']) == ["a"]
+    assert remove_from_history(parquet_dir) == 1
+    assert history_files(parquet_dir) == []
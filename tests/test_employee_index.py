@@ -0,0 +1,85 @@
+import pytest
+
+for module in ["pandas", "numpy", "sklearn", "matplotlib", "seaborn", "openpyxl"]:
+    pytest.importorskip(module)
+
+import pandas as pd
+
+from cleaning_data import normalize_mat
+from donnees import synthetic_pointages, write_csv
+from employee_index import EmployeeDirectory, EmployeeIndex
+from functions import generate_scores_between_dates
+from pipeline import ScoringPipeline
+
+
+@pytest.fixture(scope="module")
+def csv_path(tmp_path_factory):
+    df = synthetic_pointages()
+    # Matricule en minuscules et nom accentué : la recherche et l'export doivent les normaliser
+    df['Mat'] = df['Mat'].replace({"A7": "a7"})
+    df['Nom_Emp'] = df['Nom_Emp'].replace({"Employé 104": "Élodie Côté"})
+    return write_csv(df, tmp_path_factory.mktemp("donnees") / "pointages.csv")
+
+
+@pytest.fixture(scope="module")
+def pipeline(csv_path):
+    pipeline = ScoringPipeline()
+    pipeline.run(csv_path)
+    return pipeline
+
+
+@pytest.fixture(scope="module")
+def index(pipeline):
+    index = EmployeeIndex(pipeline.results['base_scores'])
+    index.set_global_scores(pipeline.results['scores'])
+    return index
+
+
+def test_lower_case_and_accented_queries_resolve(index):
+    assert index.search("a7")[0] == "A7"
+    for query in ["élodie", "ELODIE", "cote", "Côté", "elodie cote"]:
+        assert index.search(query)[0] == "104", query
+    assert index.label("104") == "104 — Élodie Côté"
+
+
+def test_prefix_search_stops_at_limit():
+    names = pd.DataFrame({
+        'mat_key': [f"{i:04d}" for i in range(100)],
+        'Nom_Emp': [f"Nom {i}" for i in range(100)],
+        'n': 1,
+    })
+    directory = EmployeeDirectory(names)
+
+    yielded = []
+    prefix = directory._prefix
+
+    def counting_prefix(keys, query):
+        for key in prefix(keys, query):
+            yielded.append(key)
+            yield key
+
+    directory._prefix = counting_prefix
+    assert directory.search("00", limit=5) == ["0000", "0001", "0002", "0003", "0004"]
+    assert len(yielded) <= 6
+
+
+def test_daily_global_scores_follow_weights(pipeline, index, csv_path):
+    scores = pipeline.run(csv_path, poids_production=0.4, poids_duree=0.6)
+    assert pipeline.recomputed == ['scores']
+
+    index.set_global_scores(scores)
+    expected = EmployeeIndex(scores)
+    pd.testing.assert_frame_equal(index.daily, expected.daily)
+    pd.testing.assert_frame_equal(
+        index.daily_scores("101", "2023-12-01", "2023-12-31"),
+        expected.daily_scores("101", "2023-12-01", "2023-12-31")
+    )
+
+
+def test_export_uses_index_keys(pipeline, index, tmp_path):
+    generate_scores_between_dates(pipeline.results['scores'].copy(), "2023-11-01", "2024-03-01", str(tmp_path))
+    export = pd.read_excel(tmp_path / "scores_2023-11-01_to_2024-03-01.xlsx", dtype={'Mat': str})
+
+    assert set(export['Mat']) <= set(index.mats)
+    assert "A7" in set(export['Mat'])
+    assert set(export['Mat']) == set(pipeline.results['scores']['Mat'].map(normalize_mat))
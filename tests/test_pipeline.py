@@ -0,0 +1,68 @@
+import pytest
+
+for module in ["pandas", "numpy", "sklearn", "matplotlib", "seaborn"]:
+    pytest.importorskip(module)
+
+import pandas as pd
+
+from donnees import synthetic_pointages, write_csv
+from pipeline import STAGES, ScoringPipeline
+
+ALL_STAGES = ['load', *STAGES]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return write_csv(synthetic_pointages(), tmp_path / "pointages.csv")
+
+
+def test_first_run_computes_every_stage(csv_path):
+    pipeline = ScoringPipeline()
+    df = pipeline.run(str(csv_path))
+    assert pipeline.recomputed == ALL_STAGES
+    assert not df.empty
+
+    pipeline.run(str(csv_path))
+    assert pipeline.recomputed == []
+
+
+def test_weight_change_only_reruns_scores(csv_path):
+    pipeline = ScoringPipeline()
+    pipeline.run(csv_path)
+    df = pipeline.run(csv_path, poids_production=0.6, poids_duree=0.4)
+    assert pipeline.recomputed == ['scores']
+
+    expected = ScoringPipeline().run(csv_path, poids_production=0.6, poids_duree=0.4)
+    pd.testing.assert_frame_equal(df, expected)
+
+    # Le réglage précédent reste en cache
+    pipeline.run(csv_path)
+    assert pipeline.recomputed == []
+
+
+def test_threshold_change_restarts_at_base_scores(csv_path):
+    pipeline = ScoringPipeline()
+    pipeline.run(csv_path)
+    pipeline.run(csv_path, seuil_cv=0.2)
+    assert pipeline.recomputed == ['base_scores', 'scores']
+
+
+def test_seuil_jours_restarts_at_presence_without_reloading(csv_path):
+    pipeline = ScoringPipeline()
+    pipeline.run(csv_path)
+    pipeline.run(csv_path, seuil_jours=5)
+    assert pipeline.recomputed == ['presence', 'base_scores', 'scores']
+    assert 'load' not in pipeline.recomputed
+
+
+def test_frame_sized_stages_keep_one_entry(csv_path):
+    pipeline = ScoringPipeline()
+    for seuil_jours in [1, 2, 3, 4]:
+        pipeline.run(csv_path, seuil_jours=seuil_jours)
+    assert len(pipeline._cache['presence']) == 1
+    assert len(pipeline._cache['scores']) == 2
+
+
+def test_unknown_parameter_raises(csv_path):
+    with pytest.raises(ValueError, match="poids_inconnu"):
+        ScoringPipeline().run(csv_path, poids_inconnu=1)
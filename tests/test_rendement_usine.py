@@ -0,0 +1,59 @@
+import pytest
+
+for module in ["pandas", "numpy", "sklearn", "matplotlib", "seaborn"]:
+    pytest.importorskip(module)
+
+import pandas as pd
+
+from donnees import pandas_scores, synthetic_pointages
+from rendement_usine import DIMENSIONS, RESOLUTIONS, SCORE_COLS, build_yield_store, rendement_series
+
+# Période qui tronque les semaines, mois et trimestres aux deux bornes
+DATE_DEBUT, DATE_FIN = pd.Timestamp("2023-11-15"), pd.Timestamp("2024-02-10")
+POIDS = {'w_d': 0.2, 'w_p': 0.5, 'w_g': 0.3}
+
+
+@pytest.fixture(scope="module")
+def scores():
+    return pandas_scores(synthetic_pointages()).assign(Date=lambda df: pd.to_datetime(df['Date']))
+
+
+def direct_series(df, resolution, dimension):
+    # Moyenne ligne à ligne du score combiné, par période bornée à l'intervalle
+    keys = [dimension] if dimension else []
+    df = df[(df['Date'] >= DATE_DEBUT) & (df['Date'] <= DATE_FIN)].dropna(subset=SCORE_COLS)
+    if RESOLUTIONS[resolution]:
+        periods = df['Date'].dt.to_period(RESOLUTIONS[resolution])
+        df = df.assign(
+            Date=periods.dt.start_time.clip(lower=DATE_DEBUT),
+            Fin=periods.dt.end_time.dt.normalize().clip(upper=DATE_FIN)
+        )
+    else:
+        df = df.assign(Fin=df['Date'])
+    df = df.assign(score_combine=(
+        POIDS['w_d'] * df['score_duree'] +
+        POIDS['w_p'] * df['score_production_journalier'] +
+        POIDS['w_g'] * df['score_global_journalier']
+    ))
+    grouped = df.groupby(['Date', 'Fin'] + keys)
+    expected = grouped['score_combine'].mean().reset_index()
+    expected['n'] = grouped.size().to_numpy()
+    return expected.sort_values(['Date'] + keys).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("dimension", DIMENSIONS)
+@pytest.mark.parametrize("resolution", list(RESOLUTIONS))
+def test_rendement_series_matches_row_mean(scores, resolution, dimension):
+    store = build_yield_store(scores)
+    result = rendement_series(store, DATE_DEBUT, DATE_FIN, resolution=resolution, dimension=dimension, **POIDS)
+    expected = direct_series(scores, resolution, dimension)
+
+    assert len(expected) > 0
+    columns = ([dimension] if dimension else []) + ['Date', 'Fin', 'n', 'score_combine']
+    pd.testing.assert_frame_equal(
+        result[columns].reset_index(drop=True), expected[columns],
+        check_dtype=False, rtol=1e-9
+    )
+    if RESOLUTIONS[resolution]:
+        # Première et dernière périodes tronquées, donc réagrégées depuis le journalier
+        assert result['Date'].min() == DATE_DEBUT and result['Fin'].max() == DATE_FIN